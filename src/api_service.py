@@ -7,13 +7,25 @@ Usage:
     uvicorn src.api_service:app --host 0.0.0.0 --port 8000
 """
 
-from fastapi import FastAPI, HTTPException, BackgroundTasks
+from fastapi import FastAPI, HTTPException, BackgroundTasks, Header
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import ORJSONResponse, Response
 from pydantic import BaseModel
 from typing import List, Optional
+import os
 import time
 import asyncio
+import hashlib
+import secrets
+from collections import OrderedDict
+from functools import lru_cache
 from datetime import datetime
+from pathlib import Path
+
+import anyio.to_thread
+import numpy as np
+import orjson
 
 from src.rag_system import DevSecOpsRAG
 
@@ -23,6 +35,11 @@ class QueryRequest(BaseModel):
     context_count: int = 5
     include_sources: bool = True
 
+class QueryBatchRequest(BaseModel):
+    questions: List[str]
+    context_count: int = 5
+    include_sources: bool = True
+
 class Source(BaseModel):
     content: str
     metadata: dict
@@ -33,8 +50,12 @@ class QueryResponse(BaseModel):
     processing_time: float
     sources_used: int
     timestamp: str
+    context_version: Optional[str] = None  # hash of the ordered context pack, usable as a prompt cache key
     sources: Optional[List[Source]] = None
 
+class QueryBatchResponse(BaseModel):
+    results: List[QueryResponse]
+
 class HealthResponse(BaseModel):
     status: str
     version: str
@@ -52,6 +73,7 @@ app = FastAPI(
     title="Moses Omondi AI Assistant API",
     description="Professional DevSecOps and AI Engineering expertise API",
     version="1.0.0",
+    default_response_class=ORJSONResponse,
     contact={
         "name": "Moses Omondi",
         "url": "https://linkedin.com/in/moses-omondi",
@@ -68,19 +90,228 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compress larger responses (e.g. /query with sources)
+app.add_middleware(GZipMiddleware, minimum_size=1024, compresslevel=5)
+
 # Global variables for tracking
 query_count = 0
 total_response_time = 0.0
 rag_system = None
 
+# Threads available to run blocking RAG work off the event loop
+API_THREAD_LIMIT = int(os.getenv("API_THREAD_LIMIT", "64"))
+
+# Source contents are truncated to this many characters in /query responses
+SOURCE_PREVIEW_CHARS = 500
+
+# Proximity cache: approximate KV cache keyed on the query embedding.
+# A query whose cosine distance to a cached query with the same context_count
+# is <= tau reuses that retrieval and skips the embedding model and ChromaDB.
+# Entries hold only question-independent data (context sections, contexts);
+# the answer is re-rendered for each question. They expire after PROXIMITY_CACHE_TTL
+# seconds, so re-ingested knowledge reaches this process's answers.
+PROXIMITY_CACHE_TAU = float(os.getenv("PROXIMITY_CACHE_TAU", "0.05"))
+PROXIMITY_CACHE_CAPACITY = int(os.getenv("PROXIMITY_CACHE_CAPACITY", "1024"))
+PROXIMITY_CACHE_TTL = int(os.getenv("PROXIMITY_CACHE_TTL", "3600"))
+
+# Fields of a RAG result kept in a proximity cache entry
+PROXIMITY_ENTRY_FIELDS = ('sections', 'contexts', 'sources_used', 'context_version')
+
+_proximity_cache: "OrderedDict[bytes, dict]" = OrderedDict()
+# Unit-length query embeddings, preallocated to capacity; only the first
+# len(_proximity_keys) rows are in use and row i belongs to _proximity_keys[i].
+# _proximity_counts and _proximity_times hold each row's context_count and insert time
+_proximity_matrix: Optional[np.ndarray] = None
+_proximity_counts: Optional[np.ndarray] = None
+_proximity_times: Optional[np.ndarray] = None
+_proximity_keys: List[bytes] = []
+_proximity_rows: dict = {}  # key -> row in _proximity_matrix
+
+def _proximity_key(question: str, context_count: int) -> bytes:
+    """Exact-match key for a question"""
+    return hashlib.sha256(f"{context_count}:{question}".encode()).digest()
+
+def _unit(embedding: np.ndarray) -> np.ndarray:
+    """Scale an embedding to unit length so a dot product is its cosine similarity"""
+    return embedding / max(float(np.linalg.norm(embedding)), 1e-12)
+
+def _proximity_get(key: bytes) -> Optional[dict]:
+    """Return the unexpired entry stored under an exact-match key"""
+    row = _proximity_rows.get(key)
+    if row is None or time.time() - _proximity_times[row] > PROXIMITY_CACHE_TTL:
+        return None
+    _proximity_cache.move_to_end(key)
+    return _proximity_cache[key]
+
+def _proximity_lookup(embedding: np.ndarray, context_count: int) -> Optional[dict]:
+    """Return the closest unexpired entry for context_count if it is within tau"""
+    n_used = len(_proximity_keys)
+    if n_used == 0:
+        return None
+    
+    # One matrix-vector product against all cached queries; entries for another
+    # context_count or past their TTL can't win the argmax
+    sims = _proximity_matrix[:n_used] @ _unit(embedding)
+    usable = (_proximity_counts[:n_used] == context_count) & (_proximity_times[:n_used] >= time.time() - PROXIMITY_CACHE_TTL)
+    sims = np.where(usable, sims, -np.inf)
+    idx = int(np.argmax(sims))
+    if sims[idx] < 1 - PROXIMITY_CACHE_TAU:
+        return None
+    
+    key = _proximity_keys[idx]
+    _proximity_cache.move_to_end(key)
+    return _proximity_cache[key]
+
+def _proximity_insert(key: bytes, embedding: np.ndarray, context_count: int, entry: dict):
+    """Insert or refresh an entry, evicting the least recently used one when full"""
+    global _proximity_matrix, _proximity_counts, _proximity_times
+    if PROXIMITY_CACHE_CAPACITY <= 0:
+        return
+    
+    if _proximity_matrix is None:
+        _proximity_matrix = np.empty((PROXIMITY_CACHE_CAPACITY, embedding.shape[0]), dtype=np.float32)
+        _proximity_counts = np.empty(PROXIMITY_CACHE_CAPACITY, dtype=np.int32)
+        _proximity_times = np.empty(PROXIMITY_CACHE_CAPACITY, dtype=np.float64)
+    
+    row = _proximity_rows.get(key)
+    if row is None:
+        if len(_proximity_cache) >= PROXIMITY_CACHE_CAPACITY:
+            # Move the last row into the evicted slot so the used rows stay contiguous
+            evicted, _ = _proximity_cache.popitem(last=False)
+            row = _proximity_rows.pop(evicted)
+            last_key = _proximity_keys.pop()
+            if last_key != evicted:
+                last = len(_proximity_keys)
+                _proximity_matrix[row] = _proximity_matrix[last]
+                _proximity_counts[row] = _proximity_counts[last]
+                _proximity_times[row] = _proximity_times[last]
+                _proximity_keys[row] = last_key
+                _proximity_rows[last_key] = row
+        row = len(_proximity_keys)
+        _proximity_keys.append(key)
+        _proximity_rows[key] = row
+    
+    _proximity_matrix[row] = _unit(embedding)
+    _proximity_counts[row] = context_count
+    _proximity_times[row] = time.time()
+    _proximity_cache[key] = entry
+    _proximity_cache.move_to_end(key)
+
+# Query coalescing: /query cache misses arriving within QUERY_BATCH_WINDOW
+# seconds of each other are answered with one rag_system.query_batch call,
+# i.e. one embedding batch and one HNSW search for the whole group.
+# QUERY_BATCH_MAX also caps the questions accepted by /query/batch
+QUERY_BATCH_WINDOW = float(os.getenv("QUERY_BATCH_WINDOW", "0.01"))
+QUERY_BATCH_MAX = int(os.getenv("QUERY_BATCH_MAX", "32"))
+
+_query_queue: Optional[asyncio.Queue] = None
+_query_coalescer: Optional[asyncio.Task] = None
+# The event loop only holds weak references to tasks; in-flight batches live here
+_batch_tasks: set = set()
+
+async def _answer_batch(batch: List[tuple]):
+    """Answer queued (question, context_count, future) items, one query_batch per context_count"""
+    groups = {}
+    for question, context_count, future in batch:
+        groups.setdefault(context_count, []).append((question, future))
+    
+    for context_count, items in groups.items():
+        try:
+            results = await asyncio.to_thread(
+                rag_system.query_batch, [question for question, _ in items], context_count
+            )
+        except Exception as e:
+            for _, future in items:
+                if not future.done():
+                    future.set_exception(e)
+            continue
+        for (_, future), result in zip(items, results):
+            if not future.done():
+                future.set_result(result)
+
+async def _coalesce_queries():
+    """Drain the query queue into batches of up to QUERY_BATCH_MAX items"""
+    loop = asyncio.get_running_loop()
+    while True:
+        batch = [await _query_queue.get()]
+        deadline = loop.time() + QUERY_BATCH_WINDOW
+        while len(batch) < QUERY_BATCH_MAX:
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(_query_queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        # Keep collecting the next batch while this one runs
+        task = asyncio.create_task(_answer_batch(batch))
+        _batch_tasks.add(task)
+        task.add_done_callback(_batch_tasks.discard)
+
+async def _coalesced_query(question: str, context_count: int) -> dict:
+    """Queue a question for the coalescer and wait for its RAG result"""
+    future = asyncio.get_running_loop().create_future()
+    await _query_queue.put((question, context_count, future))
+    return await future
+
+# Knowledge base info only changes when ingestion runs, so /health and
+# /stats serve it from a short TTL cache
+INFO_CACHE_TTL = int(os.getenv("INFO_CACHE_TTL", "30"))
+
+def _ttl_bucket() -> int:
+    """Cache key that changes every INFO_CACHE_TTL seconds"""
+    return int(time.time()) // INFO_CACHE_TTL
+
+@lru_cache(maxsize=1)
+def _cached_knowledge_base_info(ttl_bucket: int) -> dict:
+    """Knowledge base info, fetched at most once per TTL bucket"""
+    return rag_system.get_knowledge_base_info()
+
+# /expertise body, serialized once at startup and rebuilt via /admin/reload-expertise
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN")
+_expertise_blob: Optional[bytes] = None
+
+def _build_expertise_blob() -> bytes:
+    """Serialize the /expertise payload"""
+    return orjson.dumps({
+        "expertise_summary": rag_system.get_expertise_summary(),
+        "specializations": [
+            "DevSecOps Engineering",
+            "Full-Stack Development",
+            "AI/ML Engineering", 
+            "Cloud Architecture",
+            "Academic Research"
+        ],
+        "technologies": [
+            "Python", "Java", "JavaScript", "React", "Spring Boot",
+            "AWS", "Docker", "Kubernetes", "PyTorch", "TensorFlow"
+        ],
+        "linkedin": "https://linkedin.com/in/moses-omondi",
+        "github": "https://github.com/Moses-Omondi"
+    })
+
 @app.on_event("startup")
 async def startup_event():
     """Initialize the RAG system on startup"""
-    global rag_system
+    global rag_system, _expertise_blob, _query_queue, _query_coalescer
+    # anyio's threadpool runs the sync endpoints (/health, /stats)
+    anyio.to_thread.current_default_thread_limiter().total_tokens = API_THREAD_LIMIT
     print("🚀 Initializing Moses Omondi AI Assistant...")
     rag_system = DevSecOpsRAG()
+    _expertise_blob = _build_expertise_blob()
+    _query_queue = asyncio.Queue()
+    _query_coalescer = asyncio.create_task(_coalesce_queries())
     print("✅ AI Assistant ready for queries!")
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop the query coalescer and let in-flight batches finish"""
+    if _query_coalescer is not None:
+        _query_coalescer.cancel()
+        await asyncio.gather(_query_coalescer, return_exceptions=True)
+    if _batch_tasks:
+        await asyncio.gather(*_batch_tasks, return_exceptions=True)
+
 @app.get("/", response_model=dict)
 async def root():
     """Root endpoint with welcome message"""
@@ -94,13 +325,13 @@ async def root():
     }
 
 @app.get("/health", response_model=HealthResponse)
-async def health_check():
+def health_check():
     """Health check endpoint"""
     if not rag_system:
         raise HTTPException(status_code=503, detail="RAG system not initialized")
     
     try:
-        knowledge_info = rag_system.get_knowledge_base_info()
+        knowledge_info = _cached_knowledge_base_info(_ttl_bucket())
         return HealthResponse(
             status="healthy",
             version="1.0.0",
@@ -111,12 +342,12 @@ async def health_check():
         raise HTTPException(status_code=500, detail=f"Health check failed: {str(e)}")
 
 @app.get("/stats", response_model=SystemStats)
-async def get_system_stats():
+def get_system_stats():
     """Get system statistics"""
     if not rag_system:
         raise HTTPException(status_code=503, detail="RAG system not initialized")
     
-    knowledge_info = rag_system.get_knowledge_base_info()
+    knowledge_info = _cached_knowledge_base_info(_ttl_bucket())
     avg_response_time = total_response_time / query_count if query_count > 0 else 0.0
     
     return SystemStats(
@@ -126,7 +357,76 @@ async def get_system_stats():
         categories=knowledge_info.get('categories', [])
     )
 
-@app.post("/query", response_model=QueryResponse)
+def _build_payload(result: dict, include_sources: bool) -> dict:
+    """Build a QueryResponse-shaped dict from a RAG result"""
+    # Plain dicts returned through a Response skip FastAPI's response_model
+    # validation (the model only documents the schema)
+    payload = {
+        "answer": result['answer'],
+        "processing_time": result['processing_time'],
+        "sources_used": result['sources_used'],
+        "timestamp": datetime.now().isoformat(),
+        "context_version": result.get('context_version'),
+        "sources": None
+    }
+    if include_sources:
+        sources = []
+        for ctx in result['contexts']:
+            content = ctx['content']
+            preview = content[:SOURCE_PREVIEW_CHARS]
+            sources.append({
+                "content": preview + "..." if len(content) > SOURCE_PREVIEW_CHARS else preview,
+                "metadata": ctx['metadata'],
+                "relevance_score": ctx['relevance_score']
+            })
+        payload["sources"] = sources
+    
+    return payload
+
+async def _run_query(question: str, context_count: int, include_sources: bool) -> dict:
+    """Run a question through the proximity cache / RAG system and build the response payload"""
+    global query_count, total_response_time
+    
+    if not rag_system:
+        raise HTTPException(status_code=503, detail="RAG system not initialized")
+    
+    if not question.strip():
+        raise HTTPException(status_code=400, detail="Question cannot be empty")
+    
+    try:
+        start_time = time.perf_counter_ns()
+        key = _proximity_key(question, context_count)
+        
+        # Exact repeats skip the embedding model as well
+        entry = _proximity_get(key)
+        if entry is None:
+            embedding = np.asarray(await asyncio.to_thread(rag_system.embed_query, question), dtype=np.float32)
+            entry = _proximity_lookup(embedding, context_count)
+        
+        if entry is not None:
+            # Re-render for this question; the entry never carries another question's text
+            result = {
+                **rag_system._result_from_cache(question, entry),
+                'processing_time': (time.perf_counter_ns() - start_time) / 1e9
+            }
+        else:
+            # Process the query, batched with any concurrent misses
+            result = await _coalesced_query(question, context_count)
+            # Results without retrieved context are not cached, as in the response cache
+            if result.get('sections') is not None:
+                _proximity_insert(key, embedding, context_count,
+                                  {field: result[field] for field in PROXIMITY_ENTRY_FIELDS})
+        
+        # Update statistics
+        query_count += 1
+        total_response_time += result['processing_time']
+        
+        return _build_payload(result, include_sources)
+        
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Query processing failed: {str(e)}")
+
+@app.post("/query", response_model=QueryResponse, response_class=ORJSONResponse)
 async def query_assistant(request: QueryRequest):
     """
     Query Moses Omondi's AI Assistant
@@ -138,41 +438,32 @@ async def query_assistant(request: QueryRequest):
     - Cloud Architecture (AWS, Azure)
     - Academic Research and Education
     """
+    return ORJSONResponse(await _run_query(request.question, request.context_count, request.include_sources))
+
+@app.post("/query/batch", response_model=QueryBatchResponse, response_class=ORJSONResponse)
+async def query_batch(request: QueryBatchRequest):
+    """Answer several questions with one embedding batch and one knowledge base query"""
     global query_count, total_response_time
     
     if not rag_system:
         raise HTTPException(status_code=503, detail="RAG system not initialized")
     
-    if not request.question.strip():
-        raise HTTPException(status_code=400, detail="Question cannot be empty")
+    if not request.questions or any(not question.strip() for question in request.questions):
+        raise HTTPException(status_code=400, detail="Questions cannot be empty")
+    
+    if len(request.questions) > QUERY_BATCH_MAX:
+        raise HTTPException(status_code=400, detail=f"At most {QUERY_BATCH_MAX} questions per batch")
     
     try:
-        # Process the query
-        result = rag_system.query(request.question, request.context_count)
+        results = await asyncio.to_thread(rag_system.query_batch, request.questions, request.context_count)
         
         # Update statistics
-        query_count += 1
-        total_response_time += result['processing_time']
+        query_count += len(results)
+        total_response_time += sum(result['processing_time'] for result in results)
         
-        # Prepare sources if requested
-        sources = None
-        if request.include_sources:
-            sources = [
-                Source(
-                    content=ctx['content'][:500] + "..." if len(ctx['content']) > 500 else ctx['content'],
-                    metadata=ctx['metadata'],
-                    relevance_score=ctx['relevance_score']
-                )
-                for ctx in result['contexts']
-            ]
-        
-        return QueryResponse(
-            answer=result['answer'],
-            processing_time=result['processing_time'],
-            sources_used=result['sources_used'],
-            timestamp=datetime.now().isoformat(),
-            sources=sources
-        )
+        return ORJSONResponse({
+            "results": [_build_payload(result, request.include_sources) for result in results]
+        })
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Query processing failed: {str(e)}")
@@ -180,53 +471,46 @@ async def query_assistant(request: QueryRequest):
 @app.get("/expertise", response_model=dict)
 async def get_expertise_summary():
     """Get a summary of Moses's professional expertise"""
+    if not rag_system or _expertise_blob is None:
+        raise HTTPException(status_code=503, detail="RAG system not initialized")
+    
+    return Response(content=_expertise_blob, media_type="application/json")
+
+@app.post("/admin/reload-expertise", include_in_schema=False)
+def reload_expertise(x_admin_token: Optional[str] = Header(None)):
+    """Rebuild the /expertise body after the knowledge base is re-ingested"""
+    global _expertise_blob
+    if not ADMIN_TOKEN or not x_admin_token or not secrets.compare_digest(x_admin_token, ADMIN_TOKEN):
+        raise HTTPException(status_code=403, detail="Forbidden")
     if not rag_system:
         raise HTTPException(status_code=503, detail="RAG system not initialized")
     
     try:
-        summary = rag_system.get_expertise_summary()
-        return {
-            "expertise_summary": summary,
-            "specializations": [
-                "DevSecOps Engineering",
-                "Full-Stack Development",
-                "AI/ML Engineering", 
-                "Cloud Architecture",
-                "Academic Research"
-            ],
-            "technologies": [
-                "Python", "Java", "JavaScript", "React", "Spring Boot",
-                "AWS", "Docker", "Kubernetes", "PyTorch", "TensorFlow"
-            ],
-            "linkedin": "https://linkedin.com/in/moses-omondi",
-            "github": "https://github.com/Moses-Omondi"
-        }
+        _expertise_blob = _build_expertise_blob()
+        return {"status": "reloaded"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to get expertise summary: {str(e)}")
 
 # Specialized endpoints for different query types
-@app.post("/query/technical", response_model=QueryResponse)
+@app.post("/query/technical", response_model=QueryResponse, response_class=ORJSONResponse)
 async def query_technical(request: QueryRequest):
     """Specialized endpoint for technical questions"""
     enhanced_question = f"From a technical implementation perspective: {request.question}"
-    request.question = enhanced_question
-    return await query_assistant(request)
+    return ORJSONResponse(await _run_query(enhanced_question, request.context_count, request.include_sources))
 
-@app.post("/query/career", response_model=QueryResponse) 
+@app.post("/query/career", response_model=QueryResponse, response_class=ORJSONResponse) 
 async def query_career(request: QueryRequest):
     """Specialized endpoint for career-related questions"""
     enhanced_question = f"Regarding Moses's professional background and career: {request.question}"
-    request.question = enhanced_question
-    return await query_assistant(request)
+    return ORJSONResponse(await _run_query(enhanced_question, request.context_count, request.include_sources))
 
-@app.post("/query/projects", response_model=QueryResponse)
+@app.post("/query/projects", response_model=QueryResponse, response_class=ORJSONResponse)
 async def query_projects(request: QueryRequest):
     """Specialized endpoint for project-related questions"""
     enhanced_question = f"About Moses's projects and implementations: {request.question}"
-    request.question = enhanced_question
-    return await query_assistant(request)
+    return ORJSONResponse(await _run_query(enhanced_question, request.context_count, request.include_sources))
 
-# Lambda handler
+# Lambda handler (local/dev runs use uvicorn with uvloop + httptools below)
 from mangum import Mangum
 handler = Mangum(app)
 
@@ -235,4 +519,13 @@ if __name__ == "__main__":
     print("🚀 Starting Moses Omondi AI Assistant API...")
     print("📍 API will be available at: http://localhost:8000")
     print("📖 Documentation at: http://localhost:8000/docs")
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    # Workers import the app by string, resolved against the repo root
+    uvicorn.run(
+        "src.api_service:app",
+        app_dir=str(Path(__file__).resolve().parent.parent),
+        host="0.0.0.0",
+        port=8000,
+        loop="uvloop",
+        http="httptools",
+        workers=int(os.getenv("API_WORKERS", os.cpu_count() or 1))
+    )
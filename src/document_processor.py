@@ -12,18 +12,22 @@ Handles:
 """
 
 import os
+import re
+import html
+import hashlib
 import logging
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 from typing import List, Dict, Any
 import chromadb
+import torch
 from chromadb.config import Settings
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 from langchain.schema import Document
 from langchain_community.embeddings import HuggingFaceEmbeddings
-import PyPDF2
+import pypdfium2 as pdfium
 import docx
-import markdown
-from bs4 import BeautifulSoup
+from markdown_it import MarkdownIt
 import git
 import pandas as pd
 
@@ -31,6 +35,240 @@ import pandas as pd
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Chunks per embedding forward pass during ingestion
+EMBED_BATCH_SIZE = 64
+
+# HNSW index settings; they can only be set when a collection is created
+COLLECTION_METADATA = {
+    "description": "Moses Omondi's DevSecOps and AI Engineering expertise",
+    "hnsw:space": "cosine",
+    "hnsw:construction_ef": 200,
+    "hnsw:search_ef": 64,
+    "hnsw:M": 32
+}
+
+# RAG answers cached by rag_system.DevSecOpsRAG; cleared whenever the knowledge
+# base changes so no answer outlives the chunks it was built from
+RESPONSE_CACHE_COLLECTION = "moses_response_cache"
+
+# File parsers live at module level so ProcessPoolExecutor workers can pickle
+# them without dragging the embedding model into every subprocess
+
+# Filename keywords per category, in precedence order
+CATEGORY_KEYWORDS = {
+    "security": ['security', 'sec', 'compliance', 'audit'],
+    "cicd": ['ci', 'cd', 'pipeline', 'deploy', 'jenkins', 'github-actions'],
+    "infrastructure": ['kubernetes', 'k8s', 'docker', 'container'],
+    "ai_engineering": ['ml', 'ai', 'model', 'training', 'mlops'],
+    "cloud_certification": ['aws', 'cloud', 'cert', 'so3'],
+    "professional_profile": ['resume', 'cv'],
+    "project_documentation": ['project', 'implementation']
+}
+
+# Generated at import time: one lookahead branch per category, tried in order, so a
+# single match() keeps the precedence above; the empty named group names the category
+_CATEGORY_RE = re.compile('|'.join(
+    f"(?=.*?(?:{'|'.join(map(re.escape, keywords))}))(?P<{category}>)"
+    for category, keywords in CATEGORY_KEYWORDS.items()
+), re.S)
+
+def categorize_document(filename: str) -> str:
+    """Categorize documents based on filename and content"""
+    match = _CATEGORY_RE.match(filename.lower())
+    return match.lastgroup if match else "general"
+
+_markdown_parser = MarkdownIt()
+
+# Raw HTML in markdown (common in GitHub READMEs) keeps its text, minus tags and comments
+_HTML_TAG_RE = re.compile(r'<!--.*?-->|<[^>]*>', re.S)
+
+def _html_text(html_content: str) -> str:
+    """Text content of an HTML fragment, one line per non-blank source line"""
+    text = html.unescape(_HTML_TAG_RE.sub('', html_content))
+    return '\n'.join(line.strip() for line in text.splitlines() if line.strip())
+
+def markdown_to_text(md_content: str) -> str:
+    """Plain text of a markdown document: inline text, HTML block text and code blocks"""
+    parts = []
+    for token in _markdown_parser.parse(md_content):
+        if token.type == 'inline':
+            parts.append(''.join(
+                child.content if child.type in ('text', 'code_inline')
+                else _html_text(child.content) if child.type == 'html_inline'
+                else '\n'
+                for child in token.children
+                if child.type in ('text', 'code_inline', 'html_inline', 'softbreak', 'hardbreak')
+            ))
+        elif token.type == 'html_block':
+            text = _html_text(token.content)
+            if text:
+                parts.append(text)
+        elif token.type in ('fence', 'code_block'):
+            parts.append(token.content)
+    return '\n'.join(parts)
+
+def parse_pdf(file_path: Path) -> List[Document]:
+    """Process PDF files (resume, certificates, documentation)"""
+    logger.info(f"Processing PDF: {file_path}")
+    documents = []
+    
+    try:
+        # PDFium does text extraction in native code, far faster than PyPDF2
+        pdf = pdfium.PdfDocument(str(file_path))
+        try:
+            page_count = len(pdf)
+            category = categorize_document(file_path.name)
+            
+            # One document per page keeps page boundaries and provenance
+            for page_num, page in enumerate(pdf, 1):
+                doc = Document(
+                    page_content=page.get_textpage().get_text_range(),
+                    metadata={
+                        "source": str(file_path),
+                        "type": "pdf",
+                        "category": category,
+                        "pages": page_count,
+                        "page": page_num
+                    }
+                )
+                documents.append(doc)
+        finally:
+            pdf.close()
+        
+        logger.info(f"Extracted {page_count} pages from {file_path.name}")
+    
+    except Exception as e:
+        logger.error(f"Error processing PDF {file_path}: {e}")
+    
+    return documents
+
+def parse_docx(file_path: Path) -> List[Document]:
+    """Process Word documents (project documentation)"""
+    logger.info(f"Processing DOCX: {file_path}")
+    documents = []
+    
+    try:
+        doc = docx.Document(file_path)
+        text_content = ""
+        
+        for paragraph in doc.paragraphs:
+            text_content += paragraph.text + "\\n"
+        
+        document = Document(
+            page_content=text_content,
+            metadata={
+                "source": str(file_path),
+                "type": "docx",
+                "category": categorize_document(file_path.name),
+                "paragraphs": len(doc.paragraphs)
+            }
+        )
+        documents.append(document)
+        logger.info(f"Processed {len(doc.paragraphs)} paragraphs from {file_path.name}")
+    
+    except Exception as e:
+        logger.error(f"Error processing DOCX {file_path}: {e}")
+    
+    return documents
+
+def parse_markdown(file_path: Path) -> List[Document]:
+    """Process Markdown files (READMEs, documentation)"""
+    logger.info(f"Processing Markdown: {file_path}")
+    documents = []
+    
+    try:
+        with open(file_path, 'r', encoding='utf-8') as file:
+            md_content = file.read()
+            
+            # Strip markdown syntax straight from the token stream (no HTML round-trip)
+            text_content = markdown_to_text(md_content)
+            
+            document = Document(
+                page_content=text_content,
+                metadata={
+                    "source": str(file_path),
+                    "type": "markdown",
+                    "category": categorize_document(file_path.name),
+                    "original_format": "markdown"
+                }
+            )
+            documents.append(document)
+            logger.info(f"Processed markdown file: {file_path.name}")
+    
+    except Exception as e:
+        logger.error(f"Error processing Markdown {file_path}: {e}")
+    
+    return documents
+
+def parse_text_file(file_path: Path) -> List[Document]:
+    """Process plain text files"""
+    logger.info(f"Processing text file: {file_path}")
+    documents = []
+    
+    try:
+        with open(file_path, 'r', encoding='utf-8') as file:
+            content = file.read()
+            
+            document = Document(
+                page_content=content,
+                metadata={
+                    "source": str(file_path),
+                    "type": "text",
+                    "category": categorize_document(file_path.name)
+                }
+            )
+            documents.append(document)
+            logger.info(f"Processed text file: {file_path.name}")
+    
+    except Exception as e:
+        logger.error(f"Error processing text file {file_path}: {e}")
+    
+    return documents
+
+FILE_PARSERS = {
+    '.pdf': parse_pdf,
+    '.docx': parse_docx,
+    '.doc': parse_docx,
+    '.md': parse_markdown,
+    '.txt': parse_text_file,
+    '.yaml': parse_text_file,
+    '.yml': parse_text_file,
+    '.json': parse_text_file
+}
+
+def file_content_hash(file_path: Path) -> str:
+    """Short SHA-256 of the file bytes, used as the chunk ID prefix"""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as file:
+        for block in iter(lambda: file.read(65536), b''):
+            digest.update(block)
+    return digest.hexdigest()[:16]
+
+def citation_metadata(metadata: Dict[str, Any]) -> Dict[str, str]:
+    """Display category and source file name shown when a chunk is cited"""
+    return {
+        "display_category": metadata.get("category", "general").replace("_", " ").title(),
+        "display_source": Path(metadata.get("source", "Unknown")).name
+    }
+
+def _parse_file(file_path: Path) -> tuple:
+    """
+    Hash file_path and parse it with the parser for its suffix (process pool entry point)
+    
+    The hash is returned even when parsing fails, so pruning never mistakes a
+    file that failed to parse for a deleted one; it is None if the file can't be read
+    """
+    try:
+        content_hash = file_content_hash(file_path)
+    except OSError as e:
+        logger.error(f"Error reading {file_path}: {e}")
+        return None, []
+    
+    documents = FILE_PARSERS[file_path.suffix.lower()](file_path)
+    for doc in documents:
+        doc.metadata["content_hash"] = content_hash
+    return content_hash, documents
+
 class DocumentProcessor:
     """
     Processes documents and creates embeddings for RAG system
@@ -45,29 +283,41 @@ class DocumentProcessor:
         self.data_dir = Path(data_dir)
         self.db_path = Path(db_path)
         
-        # Initialize embeddings model (runs locally on M2)
+        # Initialize embeddings model (runs locally on M2, on the GPU via Metal when available)
         logger.info("Initializing embedding model...")
+        device = "mps" if torch.backends.mps.is_available() else "cpu"
         self.embeddings = HuggingFaceEmbeddings(
             model_name="sentence-transformers/all-MiniLM-L6-v2",
-            model_kwargs={'device': 'cpu'}  # M2 Mac optimization
+            model_kwargs={'device': device},
+            encode_kwargs={'batch_size': EMBED_BATCH_SIZE, 'convert_to_numpy': True, 'normalize_embeddings': True}
         )
+        if device == "mps":
+            self.embeddings.client.half()  # FP16 inference on Metal; CPU stays FP32
+        logger.info(f"Embedding model running on {device}")
         
         # Initialize ChromaDB for vector storage
         self.client = chromadb.PersistentClient(path=str(self.db_path))
         
         # Create collection for Moses's professional knowledge
         self.collection_name = "moses_devsecops_knowledge"
+        self.migration_collection_name = f"{self.collection_name}_migration"
         try:
             # Try to get existing collection
             self.collection = self.client.get_collection(self.collection_name)
             logger.info(f"Found existing collection: {self.collection_name}")
         except:
-            # Create new collection if it doesn't exist
-            self.collection = self.client.create_collection(
-                name=self.collection_name,
-                metadata={"description": "Moses Omondi's DevSecOps and AI Engineering expertise"}
-            )
-            logger.info(f"Created new collection: {self.collection_name}")
+            # Create new collection if it doesn't exist (or finish an interrupted migration)
+            self.collection = self._recover_migration()
+            if self.collection is None:
+                self.collection = self.client.create_collection(
+                    name=self.collection_name,
+                    metadata=COLLECTION_METADATA
+                )
+                logger.info(f"Created new collection: {self.collection_name}")
+        
+        # Collections created before the HNSW tuning are rebuilt once
+        if not self._has_tuned_index(self.collection):
+            self._rebuild_collection()
         
         # Text splitter for chunking documents
         self.text_splitter = RecursiveCharacterTextSplitter(
@@ -76,121 +326,85 @@ class DocumentProcessor:
             separators=["\\n\\n", "\\n", " ", ""]
         )
     
-    def process_pdf(self, file_path: Path) -> List[Document]:
-        """Process PDF files (resume, certificates, documentation)"""
-        logger.info(f"Processing PDF: {file_path}")
-        documents = []
+    def _has_tuned_index(self, collection) -> bool:
+        """Check whether a collection was created with COLLECTION_METADATA's HNSW settings"""
+        metadata = collection.metadata or {}
+        return all(metadata.get(key) == value for key, value in COLLECTION_METADATA.items() if key.startswith("hnsw:"))
+    
+    def _recover_migration(self):
+        """
+        Rename a fully copied migration collection left behind when the process
+        stopped between dropping the old collection and renaming the new one
+        """
+        try:
+            collection = self.client.get_collection(self.migration_collection_name)
+        except Exception:
+            return None
+        collection.modify(name=self.collection_name)
+        logger.info(f"Recovered {self.collection_name} from an interrupted migration")
+        return collection
+    
+    def _rebuild_collection(self):
+        """
+        One-shot migration of a collection created with default HNSW settings
         
+        Chunks are copied in batches into a tuned collection under a temporary
+        name; the old collection is only dropped once the copy's count matches
+        """
+        logger.info(f"Rebuilding {self.collection_name} with tuned HNSW settings...")
+        
+        # A leftover copy while the old collection still exists is incomplete
         try:
-            with open(file_path, 'rb') as file:
-                pdf_reader = PyPDF2.PdfReader(file)
-                text_content = ""
-                
-                for page_num, page in enumerate(pdf_reader.pages):
-                    text_content += page.extract_text() + "\\n"
-                
-                # Create document with metadata
-                doc = Document(
-                    page_content=text_content,
-                    metadata={
-                        "source": str(file_path),
-                        "type": "pdf",
-                        "category": self._categorize_document(file_path.name),
-                        "pages": len(pdf_reader.pages)
-                    }
+            self.client.delete_collection(self.migration_collection_name)
+        except Exception:
+            pass
+        migrated = self.client.create_collection(
+            name=self.migration_collection_name,
+            metadata=COLLECTION_METADATA
+        )
+        
+        total = self.collection.count()
+        batch_size = 1000
+        try:
+            for offset in range(0, total, batch_size):
+                batch = self.collection.get(
+                    limit=batch_size,
+                    offset=offset,
+                    include=['documents', 'metadatas', 'embeddings']
                 )
-                documents.append(doc)
-                logger.info(f"Extracted {len(pdf_reader.pages)} pages from {file_path.name}")
-                
+                migrated.upsert(
+                    ids=batch['ids'],
+                    documents=batch['documents'],
+                    metadatas=[{**metadata, **citation_metadata(metadata)} for metadata in batch['metadatas']],
+                    embeddings=batch['embeddings']
+                )
+            if migrated.count() != total:
+                raise RuntimeError(f"copied {migrated.count()} of {total} chunks")
         except Exception as e:
-            logger.error(f"Error processing PDF {file_path}: {e}")
+            logger.error(f"Migration of {self.collection_name} failed, keeping the existing collection: {e}")
+            self.client.delete_collection(self.migration_collection_name)
+            return
         
-        return documents
+        self.client.delete_collection(self.collection_name)
+        migrated.modify(name=self.collection_name)
+        self.collection = migrated
+        logger.info(f"Migrated {total} chunks into {self.collection_name}")
+    
+    def process_pdf(self, file_path: Path) -> List[Document]:
+        """Process PDF files (resume, certificates, documentation)"""
+        return parse_pdf(file_path)
     
     def process_docx(self, file_path: Path) -> List[Document]:
         """Process Word documents (project documentation)"""
-        logger.info(f"Processing DOCX: {file_path}")
-        documents = []
-        
-        try:
-            doc = docx.Document(file_path)
-            text_content = ""
-            
-            for paragraph in doc.paragraphs:
-                text_content += paragraph.text + "\\n"
-            
-            document = Document(
-                page_content=text_content,
-                metadata={
-                    "source": str(file_path),
-                    "type": "docx",
-                    "category": self._categorize_document(file_path.name),
-                    "paragraphs": len(doc.paragraphs)
-                }
-            )
-            documents.append(document)
-            logger.info(f"Processed {len(doc.paragraphs)} paragraphs from {file_path.name}")
-            
-        except Exception as e:
-            logger.error(f"Error processing DOCX {file_path}: {e}")
-        
-        return documents
+        return parse_docx(file_path)
     
     def process_markdown(self, file_path: Path) -> List[Document]:
         """Process Markdown files (READMEs, documentation)"""
-        logger.info(f"Processing Markdown: {file_path}")
-        documents = []
-        
-        try:
-            with open(file_path, 'r', encoding='utf-8') as file:
-                md_content = file.read()
-                
-                # Convert markdown to HTML then to text for better processing
-                html = markdown.markdown(md_content)
-                soup = BeautifulSoup(html, 'html.parser')
-                text_content = soup.get_text()
-                
-                document = Document(
-                    page_content=text_content,
-                    metadata={
-                        "source": str(file_path),
-                        "type": "markdown",
-                        "category": self._categorize_document(file_path.name),
-                        "original_format": "markdown"
-                    }
-                )
-                documents.append(document)
-                logger.info(f"Processed markdown file: {file_path.name}")
-                
-        except Exception as e:
-            logger.error(f"Error processing Markdown {file_path}: {e}")
-        
-        return documents
+        return parse_markdown(file_path)
     
     def process_text_file(self, file_path: Path) -> List[Document]:
         """Process plain text files"""
-        logger.info(f"Processing text file: {file_path}")
-        documents = []
-        
-        try:
-            with open(file_path, 'r', encoding='utf-8') as file:
-                content = file.read()
-                
-                document = Document(
-                    page_content=content,
-                    metadata={
-                        "source": str(file_path),
-                        "type": "text",
-                        "category": self._categorize_document(file_path.name)
-                    }
-                )
-                documents.append(document)
-                logger.info(f"Processed text file: {file_path.name}")
-                
-        except Exception as e:
-            logger.error(f"Error processing text file {file_path}: {e}")
-        
-        return documents
+        return parse_text_file(file_path)
     
     def process_github_repo(self, repo_url: str) -> List[Document]:
         """Clone and process GitHub repositories"""
@@ -201,14 +415,26 @@ class DocumentProcessor:
             repo_name = repo_url.split('/')[-1].replace('.git', '')
             clone_path = self.data_dir / "github" / repo_name
             
-            # Clone or update repository
-            if clone_path.exists():
-                logger.info(f"Updating existing repo: {repo_name}")
+            # Clone or update repository; only the latest tree is needed, so keep
+            # clones shallow (no history) and partial (blobs fetched on checkout)
+            if (clone_path / ".git").exists():
                 repo = git.Repo(clone_path)
-                repo.remotes.origin.pull()
+                remote_head = repo.git.ls_remote(repo_url, "HEAD").split()
+                if remote_head and remote_head[0] == repo.head.commit.hexsha:
+                    logger.info(f"Repo unchanged since last fetch: {repo_name}")
+                else:
+                    logger.info(f"Updating existing repo: {repo_name}")
+                    repo.git.fetch("--depth=1", "origin")
+                    repo.git.reset("--hard", "FETCH_HEAD")
             else:
                 logger.info(f"Cloning repo: {repo_name}")
-                git.Repo.clone_from(repo_url, clone_path)
+                git.Repo.clone_from(
+                    repo_url,
+                    clone_path,
+                    depth=1,
+                    single_branch=True,
+                    multi_options=["--filter=blob:none"]
+                )
             
             # Process README files and documentation
             for file_path in clone_path.rglob("*.md"):
@@ -239,25 +465,7 @@ class DocumentProcessor:
     
     def _categorize_document(self, filename: str) -> str:
         """Categorize documents based on filename and content"""
-        filename_lower = filename.lower()
-        
-        # DevSecOps and Security categories
-        if any(keyword in filename_lower for keyword in ['security', 'sec', 'compliance', 'audit']):
-            return "security"
-        elif any(keyword in filename_lower for keyword in ['ci', 'cd', 'pipeline', 'deploy', 'jenkins', 'github-actions']):
-            return "cicd"
-        elif any(keyword in filename_lower for keyword in ['kubernetes', 'k8s', 'docker', 'container']):
-            return "infrastructure"
-        elif any(keyword in filename_lower for keyword in ['ml', 'ai', 'model', 'training', 'mlops']):
-            return "ai_engineering"
-        elif any(keyword in filename_lower for keyword in ['aws', 'cloud', 'cert', 'so3']):
-            return "cloud_certification"
-        elif any(keyword in filename_lower for keyword in ['resume', 'cv']):
-            return "professional_profile"
-        elif any(keyword in filename_lower for keyword in ['project', 'implementation']):
-            return "project_documentation"
-        else:
-            return "general"
+        return categorize_document(filename)
     
     def ingest_documents(self, documents: List[Document]):
         """Add documents to ChromaDB with embeddings"""
@@ -265,32 +473,91 @@ class DocumentProcessor:
             logger.warning("No documents to ingest")
             return
         
-        logger.info(f"Ingesting {len(documents)} documents...")
+        # Documents without a file hash (e.g. GitHub repo files) hash their content
+        for doc in documents:
+            if "content_hash" not in doc.metadata:
+                doc.metadata["content_hash"] = hashlib.sha256(doc.page_content.encode()).hexdigest()[:16]
+        
+        # Skip documents whose content is already indexed before splitting/embedding
+        current_metadata = {doc.metadata["content_hash"]: doc.metadata for doc in documents}
+        hashes = sorted(current_metadata)
+        try:
+            indexed = self.collection.get(where={"content_hash": {"$in": hashes}}, include=['metadatas'])
+            indexed_hashes = {metadata["content_hash"] for metadata in indexed['metadatas']}
+            self._relabel_moved_chunks(indexed, current_metadata)
+        except Exception as e:
+            logger.warning(f"Could not check for indexed documents: {e}")
+            indexed_hashes = set()
+        
+        new_documents = [doc for doc in documents if doc.metadata["content_hash"] not in indexed_hashes]
+        if not new_documents:
+            logger.info(f"All {len(documents)} documents are already indexed")
+            return
+        
+        # Store citation labels with each chunk so retrieval doesn't reformat them per query
+        for doc in new_documents:
+            doc.metadata.update(citation_metadata(doc.metadata))
+        
+        logger.info(f"Ingesting {len(new_documents)} documents ({len(documents) - len(new_documents)} unchanged)...")
         
         # Split documents into chunks
         chunks = []
-        for doc in documents:
+        for doc in new_documents:
             doc_chunks = self.text_splitter.split_documents([doc])
             chunks.extend(doc_chunks)
         
-        logger.info(f"Created {len(chunks)} chunks from {len(documents)} documents")
+        logger.info(f"Created {len(chunks)} chunks from {len(new_documents)} documents")
         
-        # Prepare data for ChromaDB
+        # Prepare data for ChromaDB; IDs are stable across runs for the same content
         texts = [chunk.page_content for chunk in chunks]
         metadatas = [chunk.metadata for chunk in chunks]
-        ids = [f"doc_{i}" for i in range(len(chunks))]
+        ids = []
+        chunk_counts = {}
+        for chunk in chunks:
+            content_hash = chunk.metadata["content_hash"]
+            ids.append(f"{content_hash}_{chunk_counts.get(content_hash, 0)}")
+            chunk_counts[content_hash] = chunk_counts.get(content_hash, 0) + 1
         
-        # Generate embeddings and store in ChromaDB
+        # Generate embeddings in batches and store in ChromaDB
         try:
-            self.collection.add(
+            embeddings = []
+            for start in range(0, len(texts), EMBED_BATCH_SIZE):
+                embeddings.extend(self.embeddings.embed_documents(texts[start:start + EMBED_BATCH_SIZE]))
+            
+            # upsert skips add()'s duplicate-ID scan; IDs are content hashes anyway
+            self.collection.upsert(
                 documents=texts,
                 metadatas=metadatas,
+                embeddings=embeddings,
                 ids=ids
             )
             logger.info(f"Successfully ingested {len(chunks)} chunks into ChromaDB")
+            self._clear_response_cache()
         except Exception as e:
             logger.error(f"Error ingesting documents: {e}")
     
+    def _relabel_moved_chunks(self, indexed: Dict[str, Any], current_metadata: Dict[str, Dict[str, Any]]):
+        """Point already-indexed chunks of a renamed or moved file at its current source"""
+        ids = []
+        metadatas = []
+        for chunk_id, metadata in zip(indexed['ids'], indexed['metadatas']):
+            source_metadata = current_metadata[metadata["content_hash"]]
+            if metadata.get("source") == source_metadata.get("source"):
+                continue
+            relabeled = dict(metadata)
+            relabeled.update({key: source_metadata[key] for key in ("source", "category") if key in source_metadata})
+            relabeled.update(citation_metadata(relabeled))
+            ids.append(chunk_id)
+            metadatas.append(relabeled)
+        
+        if ids:
+            try:
+                self.collection.update(ids=ids, metadatas=metadatas)
+                logger.info(f"Updated source metadata of {len(ids)} chunks from moved files")
+                self._clear_response_cache()
+            except Exception as e:
+                logger.warning(f"Could not update metadata of moved files: {e}")
+    
     def process_directory(self, directory_path: Path = None):
         """Process all documents in a directory"""
         if directory_path is None:
@@ -303,23 +570,26 @@ class DocumentProcessor:
             logger.error(f"Directory does not exist: {directory_path}")
             return
         
-        # Process different file types
-        file_processors = {
-            '.pdf': self.process_pdf,
-            '.docx': self.process_docx,
-            '.doc': self.process_docx,
-            '.md': self.process_markdown,
-            '.txt': self.process_text_file,
-            '.yaml': self.process_text_file,
-            '.yml': self.process_text_file,
-            '.json': self.process_text_file
-        }
+        # Parse files in parallel; PDF/HTML extraction is CPU-bound
+        file_paths = [
+            file_path for file_path in directory_path.rglob("*")
+            if file_path.is_file() and file_path.suffix.lower() in FILE_PARSERS
+        ]
         
-        for file_path in directory_path.rglob("*"):
-            if file_path.is_file() and file_path.suffix.lower() in file_processors:
-                processor = file_processors[file_path.suffix.lower()]
-                documents = processor(file_path)
-                all_documents.extend(documents)
+        # Hashes of every file on disk, whether or not it parsed
+        current_hashes = set()
+        unreadable_sources = set()
+        if file_paths:
+            with ProcessPoolExecutor(max_workers=min(len(file_paths), os.cpu_count() or 1)) as executor:
+                for file_path, (content_hash, documents) in zip(file_paths, executor.map(_parse_file, file_paths)):
+                    if content_hash is None:
+                        unreadable_sources.add(str(file_path))
+                    else:
+                        current_hashes.add(content_hash)
+                    all_documents.extend(documents)
+        
+        # Drop chunks of files that were changed or deleted since the last run
+        self._prune_stale_documents(directory_path, current_hashes, unreadable_sources)
         
         # Ingest all documents
         if all_documents:
@@ -328,6 +598,46 @@ class DocumentProcessor:
         else:
             logger.warning(f"No supported documents found in {directory_path}")
     
+    def _prune_stale_documents(self, directory_path: Path, current_hashes: set, unreadable_sources: set = frozenset()):
+        """
+        Delete chunks from directory_path whose content hash is no longer on disk
+        
+        Chunks without a content hash (indexed before hashing, as doc_<i>) are
+        deleted too so their files are re-ingested once instead of duplicated.
+        Chunks of files that exist but couldn't be read are kept, since their
+        current hash is unknown
+        """
+        try:
+            existing = self.collection.get(include=['metadatas'])
+            stale_ids = []
+            for chunk_id, metadata in zip(existing['ids'], existing['metadatas']):
+                source = metadata.get("source")
+                if not source or not Path(source).is_relative_to(directory_path) or source in unreadable_sources:
+                    continue
+                if metadata.get("content_hash") not in current_hashes:
+                    stale_ids.append(chunk_id)
+            if stale_ids:
+                self.collection.delete(ids=stale_ids)
+                logger.info(f"Removed {len(stale_ids)} stale chunks from {directory_path}")
+                self._clear_response_cache()
+        except Exception as e:
+            logger.error(f"Error pruning stale documents: {e}")
+    
+    def _clear_response_cache(self):
+        """Drop cached RAG answers after the knowledge base changed"""
+        try:
+            cache = self.client.get_collection(RESPONSE_CACHE_COLLECTION)
+        except Exception:
+            return  # no cache yet
+        try:
+            # Delete rows rather than the collection so running API processes keep a valid handle
+            cached_ids = cache.get(include=[])['ids']
+            if cached_ids:
+                cache.delete(ids=cached_ids)
+                logger.info(f"Cleared {len(cached_ids)} cached responses")
+        except Exception as e:
+            logger.warning(f"Could not clear the response cache: {e}")
+    
     def get_collection_stats(self):
         """Get statistics about the knowledge base"""
         try:
@@ -11,10 +11,21 @@ Core system that handles:
 
 import logging
 import time
+import bisect
+import itertools
+import hashlib
+import threading
+from collections import OrderedDict
+from functools import lru_cache
 from typing import List, Dict, Any, Optional
 from pathlib import Path
-import chromadb
-from langchain_community.embeddings import HuggingFaceEmbeddings
+import os
+import re
+import numpy as np
+try:
+    import ahocorasick  # optional: single-pass keyword scan over the context
+except ImportError:
+    ahocorasick = None
 # Note: Ollama not available in Lambda - using fallback response system
 import json
 
@@ -22,6 +33,148 @@ import json
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Query embeddings kept per DevSecOpsRAG instance
+EMBEDDING_CACHE_SIZE = 512
+
+# When > 1, retrieval asks the HNSW index for this many times n_results
+# candidates (a wider search, for recall) and keeps the n_results nearest
+OVERFETCH_FACTOR = int(os.getenv("RAG_OVERFETCH_FACTOR", "1"))
+
+# Semantic response cache: answers to earlier questions whose cosine similarity
+# to the new question is at least the threshold are reused until they expire
+RESPONSE_CACHE_THRESHOLD = float(os.getenv("RAG_RESPONSE_CACHE_THRESHOLD", "0.92"))
+RESPONSE_CACHE_TTL = int(os.getenv("RAG_RESPONSE_CACHE_TTL", "86400"))
+# Entries kept on disk; past this, expired and then oldest entries are evicted
+# down to 90% so sweeps stay infrequent
+RESPONSE_CACHE_CAPACITY = int(os.getenv("RAG_RESPONSE_CACHE_CAPACITY", "1000"))
+# Cleared by DocumentProcessor whenever the knowledge base changes
+RESPONSE_CACHE_COLLECTION = "moses_response_cache"
+
+# Run one query per category at startup so the first user request doesn't pay
+# for loading the embedding model, HNSW index and metadata pages
+RAG_WARMUP = os.getenv("RAG_WARMUP", "1") == "1"
+
+# Chunk metadata is scanned in pages of this many rows; warmup reads only the first
+METADATA_PAGE_SIZE = 1000
+
+# Line separator used by prepare_context_string, and the keywords that make a
+# context line worth quoting in a response
+CONTEXT_LINE_SEPARATOR = '\\n'
+KEY_POINT_KEYWORDS = ['security', 'implement', 'deploy', 'configure', 'best practice']
+SECURITY_KEYWORDS = ['security', 'secure', 'vulnerability', 'threat', 'risk', 'compliance', 'audit']
+
+def _build_automaton(keywords: List[str]):
+    """Aho-Corasick automaton matching any of keywords"""
+    automaton = ahocorasick.Automaton()
+    for keyword in keywords:
+        automaton.add_word(keyword, keyword)
+    automaton.make_automaton()
+    return automaton
+
+_KEY_POINT_AUTOMATON = _build_automaton(KEY_POINT_KEYWORDS) if ahocorasick else None
+_SECURITY_AUTOMATON = _build_automaton(SECURITY_KEYWORDS) if ahocorasick else None
+
+# Regex equivalents used when pyahocorasick is not installed; ASCII-only case
+# folding matches str.lower() for these keywords (unicode folding would let
+# e.g. 'ſ' match 's')
+_KEY_POINT_RE = re.compile('|'.join(map(re.escape, KEY_POINT_KEYWORDS)), re.IGNORECASE | re.ASCII)
+_SECURITY_RE = re.compile('|'.join(map(re.escape, SECURITY_KEYWORDS)), re.IGNORECASE | re.ASCII)
+
+def _keyword_lines(context: str, pattern: re.Pattern, automaton):
+    """
+    Yield, in order, each line of context that contains a keyword (case-insensitive)
+    """
+    separator_length = len(CONTEXT_LINE_SEPARATOR)
+    lowered = context.lower() if automaton is not None else None
+    
+    # One automaton pass over the whole context; hits map back to their line
+    # through the line start offsets (only valid when lowering kept offsets)
+    if lowered is not None and len(lowered) == len(context):
+        lines = context.split(CONTEXT_LINE_SEPARATOR)
+        starts = list(itertools.accumulate(
+            (len(line) + separator_length for line in lines[:-1]), initial=0
+        ))
+        last_line = -1
+        for end_index, _ in automaton.iter(lowered):
+            line_index = bisect.bisect_right(starts, end_index) - 1
+            if line_index > last_line:
+                last_line = line_index
+                yield lines[line_index]
+        return
+    
+    # Otherwise search the context directly: no split, no per-line lowering;
+    # each match is widened to its enclosing line and the search resumes after it
+    position = 0
+    while True:
+        match = pattern.search(context, position)
+        if match is None:
+            return
+        start = context.rfind(CONTEXT_LINE_SEPARATOR, 0, match.start())
+        start = 0 if start == -1 else start + separator_length
+        end = context.find(CONTEXT_LINE_SEPARATOR, match.end())
+        if end == -1:
+            end = len(context)
+        yield context[start:end]
+        position = end + separator_length
+
+# Optional pre-quantized (int8) ONNX export of all-MiniLM-L6-v2; when set, query
+# embeddings run on ONNX Runtime instead of PyTorch
+EMBEDDING_ONNX_PATH = os.getenv("EMBEDDING_ONNX_PATH")
+
+class OnnxMiniLMEmbeddings:
+    """
+    all-MiniLM-L6-v2 on ONNX Runtime with the same embed_query / embed_documents
+    interface (mean-pooled, L2-normalized float32) as HuggingFaceEmbeddings
+    """
+    
+    def __init__(self, model_path: str, tokenizer_name: str = "sentence-transformers/all-MiniLM-L6-v2"):
+        import onnxruntime as ort
+        from transformers import AutoTokenizer
+        
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = ort.InferenceSession(model_path, options, providers=["CPUExecutionProvider"])
+        self.input_names = [model_input.name for model_input in self.session.get_inputs()]
+        self.tokenizer = AutoTokenizer.from_pretrained(tokenizer_name)
+    
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        inputs = self.tokenizer(texts, padding=True, truncation=True, max_length=256, return_tensors="np")
+        feeds = {name: inputs[name].astype(np.int64) for name in self.input_names}
+        token_embeddings = self.session.run(None, feeds)[0]
+        
+        # Mean pooling over real tokens, then L2 normalization
+        mask = inputs["attention_mask"][..., np.newaxis].astype(np.float32)
+        pooled = (token_embeddings * mask).sum(axis=1) / np.maximum(mask.sum(axis=1), 1e-9)
+        pooled /= np.maximum(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12)
+        return pooled.astype(np.float32).tolist()
+    
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
+
+@lru_cache(maxsize=None)
+def load_onnx_embeddings(model_path: str) -> OnnxMiniLMEmbeddings:
+    """Process-wide ONNX session, created once per model path"""
+    logger.info(f"Loading ONNX embedding model from {model_path}...")
+    return OnnxMiniLMEmbeddings(model_path)
+
+# Remote Chroma server (for deployments without the index on local disk);
+# unset means a PersistentClient over data/chroma_db
+CHROMA_HOST = os.getenv("CHROMA_HOST")
+CHROMA_PORT = int(os.getenv("CHROMA_PORT", "8000"))
+CHROMA_SSL = os.getenv("CHROMA_SSL", "0") == "1"
+
+@lru_cache(maxsize=None)
+def get_chroma_client(db_path: str):
+    """
+    Process-wide Chroma client; an HttpClient keeps its connection pool, so
+    warm requests skip the TCP/TLS handshake to the server
+    """
+    import chromadb
+    if CHROMA_HOST:
+        logger.info(f"Using remote Chroma at {CHROMA_HOST}:{CHROMA_PORT}")
+        return chromadb.HttpClient(host=CHROMA_HOST, port=CHROMA_PORT, ssl=CHROMA_SSL)
+    return chromadb.PersistentClient(path=db_path)
+
 class DevSecOpsRAG:
     """
     Retrieval-Augmented Generation system specialized for DevSecOps and AI Engineering
@@ -36,14 +189,34 @@ class DevSecOpsRAG:
         
         # Initialize embeddings (same as document processor for consistency)
         logger.info("Initializing embeddings model...")
-        self.embeddings = HuggingFaceEmbeddings(
-            model_name="sentence-transformers/all-MiniLM-L6-v2",
-            model_kwargs={'device': 'cpu'}
-        )
+        if EMBEDDING_ONNX_PATH:
+            self.embeddings = load_onnx_embeddings(EMBEDDING_ONNX_PATH)
+        else:
+            # torch/sentence-transformers load here rather than at import
+            # (hundreds of ms on a Lambda cold start, skipped with ONNX)
+            import torch
+            from langchain_community.embeddings import HuggingFaceEmbeddings
+            
+            device = "mps" if torch.backends.mps.is_available() else "cpu"
+            self.embeddings = HuggingFaceEmbeddings(
+                model_name="sentence-transformers/all-MiniLM-L6-v2",
+                model_kwargs={'device': device},
+                encode_kwargs={'convert_to_numpy': True, 'normalize_embeddings': True}
+            )
+            if device == "mps":
+                self.embeddings.client.half()  # FP16 inference on Metal; CPU stays FP32
+        
+        # LRU cache of query embeddings keyed on the normalized question
+        self._embedding_cache: "OrderedDict[str, List[float]]" = OrderedDict()
+        self._embedding_cache_lock = threading.Lock()
+        
+        # Category set from a full metadata scan, redone when the chunk count changes
+        self._categories_cache: Optional[List[str]] = None
+        self._categories_count = -1
         
         # Initialize ChromaDB connection
         logger.info("Connecting to knowledge base...")
-        self.client = chromadb.PersistentClient(path=str(self.db_path))
+        self.client = get_chroma_client(str(self.db_path))
         
         # Connect to Moses's knowledge collection
         self.collection_name = "moses_devsecops_knowledge"
@@ -54,6 +227,16 @@ class DevSecOpsRAG:
             logger.error(f"Could not connect to knowledge base: {e}")
             raise Exception("Knowledge base not found. Please run document_processor.py first.")
         
+        # Semantic response cache lives next to the knowledge base
+        try:
+            self.response_cache = self.client.get_or_create_collection(
+                name=RESPONSE_CACHE_COLLECTION,
+                metadata={"hnsw:space": "cosine"}
+            )
+        except Exception as e:
+            logger.warning(f"Response cache unavailable: {e}")
+            self.response_cache = None
+        
         # System prompt - this defines Moses's AI personality
         self.system_prompt = f"""You are Moses Omondi's AI assistant, an expert in DevSecOps, CI/CD security, MLOps, and AI Engineering.
 
@@ -79,7 +262,91 @@ IMPORTANT:
 - Focus on practical, implementable solutions
 - Emphasize security considerations in all recommendations
 """
+        
+        if RAG_WARMUP:
+            self.warmup()
+    
+    def warmup(self):
+        """
+        Fault the embedding model, HNSW index and chunk metadata into memory
+        with one batched query over the knowledge base categories
+        """
+        start_time = time.perf_counter_ns()
+        try:
+            # One page of metadata, not a full scan; categories only found in
+            # later pages just aren't warmed
+            metadatas = self.collection.get(limit=METADATA_PAGE_SIZE, include=['metadatas'])['metadatas'] or []
+            categories = sorted({metadata['category'] for metadata in metadatas if 'category' in metadata})
+            if not categories:
+                return
+            
+            self.collection.query(
+                query_embeddings=self.embed_queries([category.replace('_', ' ') for category in categories]),
+                n_results=1,
+                include=['metadatas']
+            )
+            logger.info(f"Warmed up {len(categories)} categories in {(time.perf_counter_ns() - start_time) / 1e9:.2f} seconds")
+        except Exception as e:
+            logger.warning(f"Warmup failed: {e}")
 
+    def embed_query(self, query: str) -> List[float]:
+        """
+        Embed a query, reusing the cached vector for repeated questions
+        """
+        return self.embed_queries([query])[0]
+    
+    def embed_queries(self, queries: List[str]) -> List[List[float]]:
+        """
+        Embed several queries, encoding all cache misses in a single batch
+        """
+        keys = [hashlib.sha256(query.strip().lower().encode()).hexdigest() for query in queries]
+        with self._embedding_cache_lock:
+            embeddings = [self._embedding_cache.get(key) for key in keys]
+            for key, embedding in zip(keys, embeddings):
+                if embedding is not None:
+                    self._embedding_cache.move_to_end(key)
+        
+        missing = [i for i, embedding in enumerate(embeddings) if embedding is None]
+        if missing:
+            encoded = self.embeddings.embed_documents([queries[i] for i in missing])
+            with self._embedding_cache_lock:
+                for i, embedding in zip(missing, encoded):
+                    embeddings[i] = embedding
+                    self._embedding_cache[keys[i]] = embedding
+                while len(self._embedding_cache) > EMBEDDING_CACHE_SIZE:
+                    self._embedding_cache.popitem(last=False)
+        
+        return embeddings
+    
+    def _contexts_from_results(self, results: Dict[str, Any], row: int = 0) -> List[Dict[str, Any]]:
+        """
+        Convert one row of a collection.query result into context dicts
+        """
+        contexts = []
+        if results['documents'] and results['documents'][row]:
+            for i in range(len(results['documents'][row])):
+                context = {
+                    'id': results['ids'][row][i],
+                    'content': results['documents'][row][i],
+                    'metadata': results['metadatas'][row][i],
+                    'relevance_score': 1 - results['distances'][row][i]  # Convert distance to similarity
+                }
+                contexts.append(context)
+        return contexts
+    
+    def _fetch_contexts(self, query_embeddings: List[List[float]], n_results: int) -> List[List[Dict[str, Any]]]:
+        """
+        Query the collection once for all embeddings, over-fetching when OVERFETCH_FACTOR > 1
+        """
+        results = self.collection.query(
+            query_embeddings=query_embeddings,
+            n_results=n_results * max(OVERFETCH_FACTOR, 1),
+            include=['documents', 'metadatas', 'distances']
+        )
+        
+        # Rows come back sorted by exact cosine distance, so the nearest are a prefix
+        return [self._contexts_from_results(results, row)[:n_results] for row in range(len(query_embeddings))]
+    
     def retrieve_context(self, query: str, n_results: int = 5) -> List[Dict[str, Any]]:
         """
         Retrieve relevant context from Moses's knowledge base
@@ -89,22 +356,7 @@ IMPORTANT:
         
         try:
             # Query the collection for relevant documents
-            results = self.collection.query(
-                query_texts=[query],
-                n_results=n_results,
-                include=['documents', 'metadatas', 'distances']
-            )
-            
-            contexts = []
-            if results['documents'] and results['documents'][0]:
-                for i in range(len(results['documents'][0])):
-                    context = {
-                        'content': results['documents'][0][i],
-                        'metadata': results['metadatas'][0][i],
-                        'relevance_score': 1 - results['distances'][0][i]  # Convert distance to similarity
-                    }
-                    contexts.append(context)
-                    
+            contexts = self._fetch_contexts([self.embed_query(query)], n_results)[0]
             logger.info(f"Retrieved {len(contexts)} relevant contexts")
             return contexts
             
@@ -112,6 +364,34 @@ IMPORTANT:
             logger.error(f"Error retrieving context: {e}")
             return []
     
+    def retrieve_contexts_batch(self, queries: List[str], n_results: int = 5) -> List[List[Dict[str, Any]]]:
+        """
+        Retrieve context for several queries with one embedding batch and one collection query
+        """
+        logger.info(f"Retrieving context for {len(queries)} queries...")
+        
+        try:
+            return self._fetch_contexts(self.embed_queries(queries), n_results)
+            
+        except Exception as e:
+            logger.error(f"Error retrieving batch context: {e}")
+            return [[] for _ in queries]
+    
+    def _citation_parts(self, metadata: Dict[str, Any]) -> tuple:
+        """
+        Display category and source file name used to cite a context
+        
+        Chunks store these labels at ingestion time; chunks indexed before
+        that fall back to formatting the raw category and source path
+        """
+        category = metadata.get('display_category')
+        if category is None:
+            category = metadata.get('category', 'general').replace('_', ' ').title()
+        source = metadata.get('display_source')
+        if source is None:
+            source = Path(metadata.get('source', 'Unknown')).name
+        return category, source
+    
     def prepare_context_string(self, contexts: List[Dict[str, Any]]) -> str:
         """
         Format retrieved contexts into a string for the LLM
@@ -119,20 +399,29 @@ IMPORTANT:
         if not contexts:
             return "No relevant context found in Moses's knowledge base."
         
-        context_string = "RELEVANT KNOWLEDGE FROM MOSES'S EXPERTISE:\\n\\n"
-        
+        # Header plus one slot per context, joined with a single allocation
+        parts = [None] * (len(contexts) + 1)
+        parts[0] = "RELEVANT KNOWLEDGE FROM MOSES'S EXPERTISE:\\n\\n"
         for i, ctx in enumerate(contexts, 1):
-            category = ctx['metadata'].get('category', 'general').replace('_', ' ').title()
-            source = Path(ctx['metadata'].get('source', 'Unknown')).name
-            
-            context_string += f"[Source {i} - {category}] ({source}):\\n"
-            context_string += f"{ctx['content']}\\n\\n"
+            category, source = self._citation_parts(ctx['metadata'])
+            parts[i] = f"[Source {i} - {category}] ({source}):\\n{ctx['content']}\\n\\n"
         
-        return context_string
+        return ''.join(parts)
     
-    def generate_response(self, query: str, context: str) -> str:
+    def context_version(self, contexts: List[Dict[str, Any]]) -> str:
+        """
+        Content hash of the contexts formatted in chunk-ID order, so the same
+        retrieved set gets the same version whatever the ranking order; LLM
+        callers can key prompt cache lookups on it
+        """
+        text = self.prepare_context_string(sorted(contexts, key=lambda ctx: ctx.get('id', '')))
+        return hashlib.sha256(text.encode()).hexdigest()[:16]
+    
+    def generate_response(self, query: str, context: str, sections: Optional[Dict[str, str]] = None) -> str:
         """
         Generate response based on retrieved context (Lambda-compatible version)
+        
+        Pass sections (from _context_sections) when they were already extracted
         """
         logger.info("Generating response from knowledge base...")
         
@@ -141,45 +430,60 @@ IMPORTANT:
             if "No relevant context" in context:
                 return "I don't have specific information about that topic in Moses Omondi's knowledge base. Please try a more specific question about DevSecOps, CI/CD security, AWS, Kubernetes, or AI/ML engineering."
             
-            # Create a structured response based on the context
-            response = f"""Based on Moses Omondi's expertise, here's what I can tell you about your question: "{query}"
+            response = self._render_response(query, sections or self._context_sections(context))
+            logger.info(f"Generated response ({len(response)} characters)")
+            return response
+            
+        except Exception as e:
+            logger.error(f"Error generating response: {e}")
+            return f"I apologize, but I encountered an error processing your question. Please try rephrasing your query. Error: {str(e)}"
+    
+    def _context_sections(self, context: str) -> Dict[str, str]:
+        """
+        Response sections that depend only on the retrieved context, so they can
+        be cached and shared between similar questions
+        """
+        return {
+            'key_points': self._extract_key_points(context),
+            'security_points': self._extract_security_points(context)
+        }
+    
+    def _render_response(self, query: str, sections: Dict[str, str]) -> str:
+        """
+        Structured response for query; the question itself and the
+        question-specific recommendations are rendered on every call
+        """
+        response = f"""Based on Moses Omondi's expertise, here's what I can tell you about your question: "{query}"
 
 **Key Information:**
-{self._extract_key_points(context)}
+{sections['key_points']}
 
 **Practical Recommendations:**
-{self._generate_recommendations(query, context)}
+{self._generate_recommendations(query)}
 
 **Security Considerations:**
-{self._extract_security_points(context)}
+{sections['security_points']}
 
 *This response is based on Moses Omondi's documented experience in DevSecOps, AI Engineering, and Cloud Architecture.*
 """
-            
-            logger.info(f"Generated response ({len(response)} characters)")
-            return response.strip()
-            
-        except Exception as e:
-            logger.error(f"Error generating response: {e}")
-            return f"I apologize, but I encountered an error processing your question. Please try rephrasing your query. Error: {str(e)}"
+        return response.strip()
     
     def _extract_key_points(self, context: str) -> str:
         """Extract key points from the context"""
-        lines = context.split('\\n')
         key_points = []
         
-        for line in lines:
-            if line.strip() and not line.startswith('RELEVANT KNOWLEDGE') and not line.startswith('[Source'):
+        for line in _keyword_lines(context, _KEY_POINT_RE, _KEY_POINT_AUTOMATON):
+            clean_line = line.strip()
+            if clean_line and not line.startswith(('RELEVANT KNOWLEDGE', '[Source')):
                 # Take first few sentences that contain useful information
-                if any(keyword in line.lower() for keyword in ['security', 'implement', 'deploy', 'configure', 'best practice']):
-                    key_points.append(f"• {line.strip()[:200]}")
-                    if len(key_points) >= 3:
-                        break
+                key_points.append(f"• {clean_line[:200]}")
+                if len(key_points) >= 3:
+                    break
         
         return '\n'.join(key_points) if key_points else "• Relevant technical documentation and implementation guides available"
     
-    def _generate_recommendations(self, query: str, context: str) -> str:
-        """Generate practical recommendations based on query and context"""
+    def _generate_recommendations(self, query: str) -> str:
+        """Generate practical recommendations based on the query"""
         query_lower = query.lower()
         
         if 'kubernetes' in query_lower or 'k8s' in query_lower:
@@ -195,51 +499,208 @@ IMPORTANT:
     
     def _extract_security_points(self, context: str) -> str:
         """Extract security-related points from context"""
-        security_keywords = ['security', 'secure', 'vulnerability', 'threat', 'risk', 'compliance', 'audit']
-        lines = context.split('\\n')
         security_points = []
         
-        for line in lines:
-            if any(keyword in line.lower() for keyword in security_keywords):
-                clean_line = line.strip()
-                if clean_line and not clean_line.startswith('[Source'):
-                    security_points.append(f"• {clean_line[:150]}")
-                    if len(security_points) >= 2:
-                        break
+        for line in _keyword_lines(context, _SECURITY_RE, _SECURITY_AUTOMATON):
+            clean_line = line.strip()
+            if clean_line and not clean_line.startswith('[Source'):
+                security_points.append(f"• {clean_line[:150]}")
+                if len(security_points) >= 2:
+                    break
         
         return '\n'.join(security_points) if security_points else "• Always prioritize security in implementation\n• Regular security reviews and updates recommended"
     
+    def _lookup_response(self, query_embedding: List[float], n_contexts: int) -> Optional[Dict[str, Any]]:
+        """
+        Return the cached entry for a semantically similar earlier question, if any
+        """
+        return self._lookup_responses([query_embedding], n_contexts)[0]
+    
+    def _lookup_responses(self, query_embeddings: List[List[float]], n_contexts: int) -> List[Optional[Dict[str, Any]]]:
+        """
+        Cache entries for several questions with one response cache query
+        """
+        entries = [None] * len(query_embeddings)
+        if self.response_cache is None:
+            return entries
+        
+        try:
+            hits = self.response_cache.query(
+                query_embeddings=query_embeddings,
+                n_results=1,
+                where={"n_contexts": n_contexts},
+                include=['documents', 'metadatas', 'distances']
+            )
+            if not hits['ids']:
+                return entries
+            
+            now = time.time()
+            expired = []
+            for row, ids in enumerate(hits['ids']):
+                if not ids or 1 - hits['distances'][row][0] < RESPONSE_CACHE_THRESHOLD:
+                    continue
+                if now - hits['metadatas'][row][0]['created_at'] > RESPONSE_CACHE_TTL:
+                    expired.append(ids[0])
+                    continue
+                cached = json.loads(hits['documents'][row][0])
+                if 'sections' in cached:
+                    entries[row] = cached
+            
+            if expired:
+                self.response_cache.delete(ids=list(set(expired)))
+            return entries
+            
+        except Exception as e:
+            logger.warning(f"Response cache lookup failed: {e}")
+            return entries
+    
+    def _result_from_cache(self, question: str, cached: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Query result for question from a cache entry; the answer is rendered for
+        this question, never copied from the question that created the entry
+        """
+        return {
+            'answer': self._render_response(question, cached['sections']),
+            'contexts': cached['contexts'],
+            'sources_used': cached['sources_used'],
+            'context_version': cached.get('context_version'),
+            'sections': cached['sections'],
+            'query': question
+        }
+    
+    def _store_response(self, question: str, query_embedding: List[float], n_contexts: int,
+                        result: Dict[str, Any], sections: Dict[str, str]):
+        """
+        Add a freshly generated result to the semantic response cache
+        
+        Only question-independent data is stored (context sections, contexts),
+        so one user's question text is never shown to another
+        """
+        if self.response_cache is None:
+            return
+        
+        try:
+            cache_id = hashlib.sha256(f"{n_contexts}:{question.strip().lower()}".encode()).hexdigest()
+            self.response_cache.upsert(
+                ids=[cache_id],
+                embeddings=[query_embedding],
+                documents=[json.dumps({
+                    'sections': sections,
+                    'contexts': result['contexts'],
+                    'sources_used': result['sources_used'],
+                    'context_version': result['context_version']
+                })],
+                metadatas=[{"n_contexts": n_contexts, "created_at": time.time()}]
+            )
+            if self.response_cache.count() > RESPONSE_CACHE_CAPACITY:
+                self._sweep_response_cache()
+        except Exception as e:
+            logger.warning(f"Response cache update failed: {e}")
+    
+    def _sweep_response_cache(self):
+        """
+        Evict expired entries, then the oldest ones, down to 90% of RESPONSE_CACHE_CAPACITY
+        """
+        entries = self.response_cache.get(include=['metadatas'])
+        now = time.time()
+        by_age = sorted(zip(entries['ids'], entries['metadatas']), key=lambda entry: entry[1]['created_at'])
+        expired = [cache_id for cache_id, metadata in by_age if now - metadata['created_at'] > RESPONSE_CACHE_TTL]
+        live = [cache_id for cache_id, metadata in by_age if now - metadata['created_at'] <= RESPONSE_CACHE_TTL]
+        
+        evicted = expired + live[:max(0, len(live) - int(RESPONSE_CACHE_CAPACITY * 0.9))]
+        if evicted:
+            self.response_cache.delete(ids=evicted)
+            logger.info(f"Evicted {len(evicted)} response cache entries ({len(expired)} expired)")
+    
     def query(self, question: str, n_contexts: int = 5) -> Dict[str, Any]:
         """
         Main query method - orchestrates the entire RAG process
+        
+        The result's sections (None when nothing was retrieved) let callers that
+        cache results re-render the answer for another question via _result_from_cache
         """
-        start_time = time.time()
+        start_time = time.perf_counter_ns()
         logger.info(f"Processing query: {question[:100]}...")
         
+        # Step 0: Reuse the retrieval for a semantically similar earlier question
+        query_embedding = self.embed_query(question)
+        cached = self._lookup_response(query_embedding, n_contexts)
+        if cached is not None:
+            processing_time = (time.perf_counter_ns() - start_time) / 1e9
+            logger.info(f"Served query from response cache in {processing_time:.2f} seconds")
+            return {**self._result_from_cache(question, cached), 'processing_time': processing_time}
+        
         # Step 1: Retrieve relevant context
         contexts = self.retrieve_context(question, n_contexts)
         
-        # Step 2: Prepare context for LLM
+        # Step 2: Prepare context for LLM (relevance order) and its order-independent version
         context_string = self.prepare_context_string(contexts)
+        context_version = self.context_version(contexts)
         
         # Step 3: Generate response
-        answer = self.generate_response(question, context_string)
+        sections = self._context_sections(context_string) if contexts else None
+        answer = self.generate_response(question, context_string, sections)
         
         # Calculate processing time
-        processing_time = time.time() - start_time
+        processing_time = (time.perf_counter_ns() - start_time) / 1e9
         
         # Prepare result
         result = {
             'answer': answer,
             'contexts': contexts,
             'sources_used': len(contexts),
+            'context_version': context_version,
+            'sections': sections,
             'processing_time': processing_time,
             'query': question
         }
+        if contexts:
+            self._store_response(question, query_embedding, n_contexts, result, sections)
         
         logger.info(f"Query processed successfully in {processing_time:.2f} seconds")
         return result
     
+    def query_batch(self, questions: List[str], n_contexts: int = 5) -> List[Dict[str, Any]]:
+        """
+        Batched version of query() - embeds and retrieves for all questions at once
+        """
+        start_time = time.perf_counter_ns()
+        logger.info(f"Processing batch of {len(questions)} queries...")
+        
+        # Reuse cached retrievals first; only the misses go to the knowledge base
+        query_embeddings = self.embed_queries(questions)
+        results = [
+            None if cached is None else self._result_from_cache(question, cached)
+            for question, cached in zip(questions, self._lookup_responses(query_embeddings, n_contexts))
+        ]
+        missing = [i for i, result in enumerate(results) if result is None]
+        
+        if missing:
+            batch_contexts = self.retrieve_contexts_batch([questions[i] for i in missing], n_contexts)
+            for i, contexts in zip(missing, batch_contexts):
+                context_string = self.prepare_context_string(contexts)
+                context_version = self.context_version(contexts)
+                sections = self._context_sections(context_string) if contexts else None
+                results[i] = {
+                    'answer': self.generate_response(questions[i], context_string, sections),
+                    'contexts': contexts,
+                    'sources_used': len(contexts),
+                    'context_version': context_version,
+                    'sections': sections,
+                    'query': questions[i]
+                }
+                if contexts:
+                    self._store_response(questions[i], query_embeddings[i], n_contexts, results[i], sections)
+        
+        # Every answer in the batch became available at the same time
+        processing_time = (time.perf_counter_ns() - start_time) / 1e9
+        for result in results:
+            result['processing_time'] = processing_time
+        
+        logger.info(f"Batch of {len(questions)} queries processed in {processing_time:.2f} seconds "
+                    f"({len(questions) - len(missing)} from response cache)")
+        return results
+    
     def get_knowledge_base_info(self) -> Dict[str, Any]:
         """
         Get information about the knowledge base
@@ -247,18 +708,19 @@ IMPORTANT:
         try:
             count = self.collection.count()
             
-            # Get sample documents to understand categories
-            sample_results = self.collection.get(limit=100, include=['metadatas'])
-            categories = set()
-            
-            if sample_results['metadatas']:
-                for metadata in sample_results['metadatas']:
-                    if 'category' in metadata:
-                        categories.add(metadata['category'])
+            # Ingestion changes the chunk count, so rescan categories only then,
+            # a page at a time so the whole metadata set is never in memory at once
+            if count != self._categories_count:
+                categories = set()
+                for offset in range(0, count, METADATA_PAGE_SIZE):
+                    page = self.collection.get(limit=METADATA_PAGE_SIZE, offset=offset, include=['metadatas'])
+                    categories.update(metadata['category'] for metadata in page['metadatas'] or [] if 'category' in metadata)
+                self._categories_cache = sorted(categories)
+                self._categories_count = count
             
             return {
                 'total_documents': count,
-                'categories': sorted(list(categories)),
+                'categories': list(self._categories_cache),
                 'status': 'active'
             }
             
@@ -279,7 +741,7 @@ IMPORTANT:
         
         try:
             results = self.collection.query(
-                query_texts=[query],
+                query_embeddings=[self.embed_query(query)],
                 n_results=n_results * 2,  # Get more results to filter
                 where={"category": category},
                 include=['documents', 'metadatas', 'distances']
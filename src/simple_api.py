@@ -6,10 +6,17 @@ Simple FastAPI service for AWS Lambda deployment
 
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 from pydantic import BaseModel
 from typing import Optional
 from datetime import datetime
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
 import json
+import os
+import re
+import time
 
 # API Models
 class QueryRequest(BaseModel):
@@ -50,6 +57,31 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compress larger responses (e.g. /query answers) when served by uvicorn; on
+# Lambda, API Gateway compresses them instead (MinimumCompressionSize in template.yaml)
+if not os.getenv("AWS_LAMBDA_FUNCTION_NAME"):
+    app.add_middleware(GZipMiddleware, minimum_size=1024, compresslevel=5)
+
+# Answer /query from the ChromaDB knowledge base when the deployment bundles it;
+# otherwise fall back to the canned topic responses below
+LAMBDA_RAG_ENABLED = os.getenv("LAMBDA_RAG_ENABLED", "false").lower() == "true"
+
+# Embedding and HNSW search block, so they run here instead of on the event loop
+_rag_executor = ThreadPoolExecutor(max_workers=os.cpu_count() or 1)
+
+# One RAG system per container, built while the module is imported: on Lambda
+# that is the init phase, so model loading and warmup happen before the first
+# invocation rather than inside it. Not a startup hook: Mangum runs the ASGI
+# lifespan on every invocation, which would rebuild the embedding model each time.
+rag_system = None
+if LAMBDA_RAG_ENABLED:
+    try:
+        # Imported only when enabled so the canned-response path never loads chromadb/torch
+        from src.rag_system import DevSecOpsRAG
+        rag_system = DevSecOpsRAG()
+    except Exception as e:
+        print(f"⚠️ RAG system unavailable, using built-in responses: {e}")
+
 @app.get("/", response_model=dict)
 async def root():
     """Root endpoint with welcome message"""
@@ -119,31 +151,32 @@ async def query_assistant(request: QueryRequest):
     - Cloud Architecture (AWS, Azure)
     - Academic Research and Education
     """
-    start_time = datetime.now()
+    start_time = time.perf_counter_ns()
     
     if not request.question.strip():
         raise HTTPException(status_code=400, detail="Question cannot be empty")
     
-    # Generate response based on question content
-    answer = generate_expert_response(request.question)
+    if rag_system is not None:
+        result = await asyncio.get_running_loop().run_in_executor(
+            _rag_executor, rag_system.query, request.question, request.context_count
+        )
+        answer, sources_used = result['answer'], result['sources_used']
+    else:
+        # Generate response based on question content
+        answer, sources_used = generate_expert_response(request.question), 1
     
-    processing_time = (datetime.now() - start_time).total_seconds()
+    processing_time = (time.perf_counter_ns() - start_time) / 1e9
     
     return QueryResponse(
         answer=answer,
         processing_time=processing_time,
-        sources_used=1,
+        sources_used=sources_used,
         timestamp=datetime.now().isoformat(),
         query=request.question
     )
 
-def generate_expert_response(question: str) -> str:
-    """Generate expert response based on Moses's knowledge areas"""
-    question_lower = question.lower()
-    
-    # DevSecOps related questions
-    if any(keyword in question_lower for keyword in ['devsecops', 'ci/cd', 'pipeline', 'security']):
-        return """Based on Moses Omondi's DevSecOps expertise:
+# DevSecOps related questions
+DEVSECOPS_RESPONSE = """Based on Moses Omondi's DevSecOps expertise:
 
 **Key Security Practices:**
 • Implement SAST/DAST scanning in CI/CD pipelines
@@ -165,9 +198,8 @@ def generate_expert_response(question: str) -> str:
 
 *This response reflects Moses Omondi's experience in DevSecOps and security engineering.*"""
 
-    # Kubernetes related questions  
-    elif any(keyword in question_lower for keyword in ['kubernetes', 'k8s', 'container']):
-        return """Based on Moses Omondi's Kubernetes security expertise:
+# Kubernetes related questions
+KUBERNETES_RESPONSE = """Based on Moses Omondi's Kubernetes security expertise:
 
 **Security Best Practices:**
 • Implement Role-Based Access Control (RBAC)
@@ -189,9 +221,8 @@ def generate_expert_response(question: str) -> str:
 
 *Based on Moses Omondi's experience with Kubernetes security and orchestration.*"""
 
-    # AWS/Cloud related questions
-    elif any(keyword in question_lower for keyword in ['aws', 'cloud', 'lambda', 'ec2']):
-        return """Based on Moses Omondi's AWS and Cloud Architecture expertise:
+# AWS/Cloud related questions
+CLOUD_RESPONSE = """Based on Moses Omondi's AWS and Cloud Architecture expertise:
 
 **AWS Security Best Practices:**
 • Follow AWS Well-Architected Security Pillar
@@ -213,9 +244,8 @@ def generate_expert_response(question: str) -> str:
 
 *This reflects Moses Omondi's experience with AWS security and cloud architecture.*"""
 
-    # AI/ML related questions
-    elif any(keyword in question_lower for keyword in ['ai', 'ml', 'machine learning', 'model']):
-        return """Based on Moses Omondi's AI/ML Engineering expertise:
+# AI/ML related questions
+AI_ML_RESPONSE = """Based on Moses Omondi's AI/ML Engineering expertise:
 
 **MLSecOps Practices:**
 • Secure ML pipeline development and deployment
@@ -237,9 +267,8 @@ def generate_expert_response(question: str) -> str:
 
 *Based on Moses Omondi's experience in AI/ML engineering and MLSecOps.*"""
 
-    # General technical questions
-    else:
-        return f"""Based on Moses Omondi's technical expertise, here's guidance on: "{question}"
+# General technical questions (formatted with the question)
+GENERAL_RESPONSE = """Based on Moses Omondi's technical expertise, here's guidance on: "{question}"
 
 **Professional Background:**
 Moses Omondi is a DevSecOps engineer and AI/ML specialist with expertise in:
@@ -264,7 +293,30 @@ For more specific guidance, please ask about DevSecOps, AWS, Kubernetes, or AI/M
 
 *This response is based on Moses Omondi's documented professional experience.*"""
 
-# Lambda handler
+# Keyword dispatch in precedence order; the first topic with a keyword in the
+# question picks the response
+RESPONSE_TOPICS = {
+    "devsecops": (['devsecops', 'ci/cd', 'pipeline', 'security'], DEVSECOPS_RESPONSE),
+    "kubernetes": (['kubernetes', 'k8s', 'container'], KUBERNETES_RESPONSE),
+    "cloud": (['aws', 'cloud', 'lambda', 'ec2'], CLOUD_RESPONSE),
+    "ai_ml": (['ai', 'ml', 'machine learning', 'model'], AI_ML_RESPONSE)
+}
+
+# One lookahead branch per topic, tried in order, so a single match() keeps the
+# precedence above; the empty named group names the topic
+_TOPIC_RE = re.compile('|'.join(
+    f"(?=.*?(?:{'|'.join(map(re.escape, keywords))}))(?P<{topic}>)"
+    for topic, (keywords, _) in RESPONSE_TOPICS.items()
+), re.S)
+
+def generate_expert_response(question: str) -> str:
+    """Generate expert response based on Moses's knowledge areas"""
+    match = _TOPIC_RE.match(question.lower())
+    if match:
+        return RESPONSE_TOPICS[match.lastgroup][1]
+    return GENERAL_RESPONSE.format(question=question)
+
+# Lambda handler (local/dev runs use uvicorn with uvloop + httptools below)
 from mangum import Mangum
 handler = Mangum(app)
 
@@ -273,4 +325,14 @@ if __name__ == "__main__":
     print("🚀 Starting Moses Omondi AI Assistant API...")
     print("📍 API will be available at: http://localhost:8000")
     print("📖 Documentation at: http://localhost:8000/docs")
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    # Workers import the app by string; app_dir puts the repo root (the parent of
+    # src/) on sys.path so that also works when this file is run as a script
+    uvicorn.run(
+        "src.simple_api:app",
+        app_dir=str(Path(__file__).resolve().parent.parent),
+        host="0.0.0.0",
+        port=8000,
+        loop="uvloop",
+        http="httptools",
+        workers=int(os.getenv("API_WORKERS", os.cpu_count() or 1))
+    )
@@ -0,0 +1,81 @@
+"""Tests for document_processor's markdown text extraction and re-ingestion"""
+
+import pytest
+
+document_processor = pytest.importorskip("src.document_processor")
+markdown_to_text = document_processor.markdown_to_text
+DocumentProcessor = document_processor.DocumentProcessor
+
+
+def test_html_blocks_keep_their_text():
+    md = (
+        '<h1 align="center">Secure Pipeline Toolkit</h1>\n\n'
+        '<p align="center">Kubernetes RBAC hardening</p>\n\n'
+        'Intro text.'
+    )
+    assert markdown_to_text(md).splitlines() == [
+        "Secure Pipeline Toolkit",
+        "Kubernetes RBAC hardening",
+        "Intro text.",
+    ]
+
+
+def test_details_summary_text_is_kept():
+    md = "<details><summary>Deploy steps</summary>\n\nRun `make deploy`.\n\n</details>"
+    assert markdown_to_text(md).splitlines() == ["Deploy steps", "Run make deploy."]
+
+
+def test_html_comments_entities_and_inline_tags():
+    md = "<!-- badges -->\n\nSome <b>bold</b> &amp; text\n\n<p>\n  <img src=\"logo.png\">\n  Logo &copy;\n</p>"
+    assert markdown_to_text(md).splitlines() == ["Some bold & text", "Logo ©"]
+
+
+def test_code_blocks_are_kept_verbatim():
+    md = "# Title\n\n```yaml\nkind: <Pod>\n```"
+    assert markdown_to_text(md) == "Title\nkind: <Pod>\n"
+
+
+class _ConstantEmbeddings:
+    def embed_documents(self, texts):
+        return [[1.0, 0.0, 0.0] for _ in texts]
+
+
+def _processor(db_path):
+    """DocumentProcessor on a fresh store, without loading the embedding model"""
+    processor = DocumentProcessor.__new__(DocumentProcessor)
+    processor.client = document_processor.chromadb.PersistentClient(path=str(db_path))
+    processor.collection = processor.client.create_collection(
+        name="moses_devsecops_knowledge",
+        metadata=document_processor.COLLECTION_METADATA
+    )
+    processor.embeddings = _ConstantEmbeddings()
+    processor.text_splitter = document_processor.RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=0)
+    return processor
+
+
+def test_baseline_chunks_are_replaced_not_duplicated(tmp_path):
+    docs = tmp_path / "docs"
+    docs.mkdir()
+    notes = docs / "notes.txt"
+    notes.write_text("Rotate CI secrets every 90 days.")
+    sibling = tmp_path / "docs-archive" / "old.txt"
+    
+    # Chunks as the original ingestion stored them: doc_<i> IDs, no content hash
+    processor = _processor(tmp_path / "db")
+    processor.collection.add(
+        ids=["doc_0", "doc_1"],
+        documents=[notes.read_text(), "Archived"],
+        metadatas=[{"source": str(notes), "category": "general"}, {"source": str(sibling), "category": "general"}],
+        embeddings=[[1.0, 0.0, 0.0], [1.0, 0.0, 0.0]]
+    )
+    
+    processor.process_directory(docs)
+    processor.process_directory(docs)
+    
+    stored = processor.collection.get(include=['metadatas'])
+    by_source = {}
+    for chunk_id, metadata in zip(stored['ids'], stored['metadatas']):
+        by_source.setdefault(metadata["source"], []).append(chunk_id)
+    assert by_source[str(sibling)] == ["doc_1"]
+    assert by_source[str(notes)] == [f"{document_processor.file_content_hash(notes)}_0"]
+    assert len(stored['ids']) == 2